@@ -0,0 +1,9 @@
+# app/_env_boot.py
+import functools
+
+from dotenv import load_dotenv
+
+@functools.cache
+def ensure_env() -> None:
+    """Parse .env at most once per process; real env vars always win."""
+    load_dotenv(override=False)
@@ -1,20 +1,174 @@
 # app/audit.py
+import atexit
+import csv
+import io
+import logging
+import os
+import queue
+import threading
+import time
 import uuid
+from typing import Iterable
 from sqlalchemy import text
 from app.db import ENGINE
 
+log = logging.getLogger(__name__)
+
+_COPY_SQL = (
+    "COPY public.audit_events (id, event_type, reviewer, doc_id, score, message) "
+    "FROM STDIN WITH CSV"
+)
+
+_INSERT_AUDIT = text("""
+    INSERT INTO public.audit_events (id, event_type, reviewer, doc_id, score, message)
+    VALUES (:id, :event_type, :reviewer, :doc_id, :score, :message)
+""")
+
+# Events are queued in-process and flushed in batches by a daemon thread,
+# so an approve/reject click no longer waits on its own Supabase round-trip.
+_BATCH_SIZE = 64
+_FLUSH_SECONDS = 2.0
+
+_RETRY_DELAY = 0.5
+_JOIN_TIMEOUT = 30.0  # > statement_timeout, so an in-flight write can finish
+
+_AUDIT_QUEUE: "queue.Queue[dict]" = queue.Queue()
+_FLUSH_LOCK = threading.Lock()
+_STOP = object()  # shutdown sentinel: worker flushes what it holds and exits
+
+def _take_batch(first: dict) -> list:
+    batch = [first]
+    while len(batch) < _BATCH_SIZE:
+        try:
+            item = _AUDIT_QUEUE.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _STOP:
+            batch.append(item)
+    return batch
+
+def _write_batch(batch: list) -> None:
+    # A list of payloads makes SQLAlchemy run this as an executemany.
+    with _FLUSH_LOCK, ENGINE.begin() as conn:
+        conn.execute(_INSERT_AUDIT, batch)
+
+def _flush(batch: list) -> None:
+    # Audit logging must never take the app down: retry once, then log the loss.
+    try:
+        _write_batch(batch)
+        return
+    except Exception:
+        log.warning("audit flush of %d event(s) failed; retrying", len(batch), exc_info=True)
+    time.sleep(_RETRY_DELAY)
+    try:
+        _write_batch(batch)
+    except Exception:
+        log.exception("audit flush failed twice; dropped %d event(s)", len(batch))
+
+def _worker():
+    stopping = False
+    while not stopping:
+        first = _AUDIT_QUEUE.get()
+        if first is _STOP:
+            return
+        batch = [first]
+        deadline = time.monotonic() + _FLUSH_SECONDS
+        # Flush every _BATCH_SIZE events or _FLUSH_SECONDS, whichever is first.
+        while len(batch) < _BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = _AUDIT_QUEUE.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        _flush(batch)
+
+def flush_events():
+    """
+    Stop the writer and persist everything still pending (used at interpreter
+    exit). The sentinel makes the worker flush the batch it is holding before
+    it exits; anything left on the queue afterwards is written here.
+    """
+    _AUDIT_QUEUE.put(_STOP)
+    _WORKER.join(timeout=_JOIN_TIMEOUT)
+    while True:
+        try:
+            first = _AUDIT_QUEUE.get_nowait()
+        except queue.Empty:
+            return
+        if first is not _STOP:
+            _flush(_take_batch(first))
+
+def _uuid_stream():
+    """RFC 4122 v4 UUIDs cut from one os.urandom draw per 64 ids."""
+    while True:
+        buf = os.urandom(16 * 64)
+        for i in range(64):
+            b = bytearray(buf[i * 16:(i + 1) * 16])
+            b[6] = (b[6] & 0x0F) | 0x40  # version 4
+            b[8] = (b[8] & 0x3F) | 0x80  # RFC 4122 variant
+            yield uuid.UUID(bytes=bytes(b))
+
+_UUID_GEN = _uuid_stream()
+_UUID_LOCK = threading.Lock()  # generators aren't safe across Streamlit threads
+
+def _next_uuid() -> uuid.UUID:
+    with _UUID_LOCK:
+        return next(_UUID_GEN)
+
+_WORKER = threading.Thread(target=_worker, name="audit-writer", daemon=True)
+_WORKER.start()
+atexit.register(flush_events)
+
 def log_event(event_type: str, reviewer: str, doc_id=None, score=None, message=None):
     payload = {
-        "id": str(uuid.uuid4()),
+        "id": _next_uuid(),
         "event_type": event_type,
         "reviewer": reviewer,
-        "doc_id": str(doc_id) if doc_id else None,
+        "doc_id": doc_id if isinstance(doc_id, uuid.UUID) else (uuid.UUID(doc_id) if doc_id else None),
         "score": score,
         "message": message,
     }
+    _AUDIT_QUEUE.put(payload)
+
+def log_events_bulk(rows: Iterable[dict]) -> int:
+    """
+    Backfill many audit events at once with COPY (no per-row INSERT parsing).
+    Each row uses log_event's keys; a missing "id" gets a fresh UUID.
+    Returns the number of rows written.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    n = 0
+    for p in rows:
+        # Unquoted empty CSV fields load as NULL
+        writer.writerow((
+            p.get("id") or _next_uuid(),
+            p["event_type"],
+            p["reviewer"],
+            p.get("doc_id") or "",
+            p["score"] if p.get("score") is not None else "",
+            p.get("message") or "",
+        ))
+        n += 1
+    if not n:
+        return 0
+    buf.seek(0)
 
-    with ENGINE.begin() as conn:
-        conn.execute(text("""
-            INSERT INTO public.audit_events (id, event_type, reviewer, doc_id, score, message)
-            VALUES (:id, :event_type, :reviewer, :doc_id, :score, :message)
-        """), payload)
+    raw = ENGINE.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.copy_expert(_COPY_SQL, buf)
+        cur.close()
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return n
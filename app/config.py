@@ -1,11 +1,14 @@
 # app/config.py
 import os
+from functools import lru_cache
+
 import streamlit as st
-from dotenv import load_dotenv
+from app._env_boot import ensure_env
 
 
-load_dotenv()  # local support; safe on cloud too
+ensure_env()  # local support; safe on cloud too
 
+@lru_cache(maxsize=None)
 def _safe_secrets_get(key: str, default: str = "") -> str:
     """Streamlit secrets read that won't crash locally if secrets.toml is missing."""
     try:
@@ -15,6 +18,7 @@ def _safe_secrets_get(key: str, default: str = "") -> str:
         return default
     return default
 
+@lru_cache(maxsize=None)
 def is_cloud() -> bool:
     """
     Heuristic: if Streamlit secrets exist (cloud commonly uses it),
@@ -27,11 +31,13 @@ def is_cloud() -> bool:
         pass
     return os.getenv("STREAMLIT_SERVER_HEADLESS", "").lower() in ("true", "1")
 
+@lru_cache(maxsize=None)
 def get_debug_flag() -> bool:
     # Turn debug on only when explicitly enabled (never by default)
     val = _safe_secrets_get("DEBUG_DB", "") or os.getenv("DEBUG_DB", "")
     return str(val).strip().lower() in ("1", "true", "yes", "on")
 
+@lru_cache(maxsize=None)
 def get_db_urls() -> dict:
     """
     Provide both URLs so we can fallback:
@@ -62,3 +68,8 @@ def get_db_urls() -> dict:
             direct = generic
 
     return {"pooler": pooler, "direct": direct}
+
+def _reset_config_cache() -> None:
+    """Forget cached secrets/env lookups (e.g. after changing env in tests)."""
+    for fn in (_safe_secrets_get, is_cloud, get_debug_flag, get_db_urls):
+        fn.cache_clear()
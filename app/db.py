@@ -2,12 +2,22 @@
 from __future__ import annotations
 
 import os
+import types
+from functools import lru_cache
 from urllib.parse import urlparse
 
+import psycopg2.extras
 import streamlit as st
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 
+from app._env_boot import ensure_env
+
+ensure_env()
+
+# Bind uuid.UUID params natively (no str() round-trip per id column)
+psycopg2.extras.register_uuid()
+
 # -----------------------------
 # Secrets + ENV helpers
 # -----------------------------
@@ -41,6 +51,7 @@ def get_db_urls() -> dict:
     migrations = _sget("DB_URL_MIGRATIONS", "") or _eget("DB_URL_MIGRATIONS", "") or _eget("DB_URL_DIRECT", "")
     return {"pooler": pooler, "migrations": migrations}
 
+@lru_cache(maxsize=8)
 def _parse_db_info(url: str) -> dict:
     u = urlparse(url)
     return {
@@ -52,19 +63,42 @@ def _parse_db_info(url: str) -> dict:
     }
 
 def _make_engine(db_url: str) -> Engine:
+    """
+    Engines run psycopg2 in "values_plus_batch" executemany mode. Passing a
+    list of dicts to conn.execute(text(sql), rows) goes through
+    psycopg2.extras.execute_batch: the per-row statements are joined into
+    pages of executemany_batch_page_size and sent as one round-trip per page
+    (the server still runs one INSERT per row). Batched writers (audit log,
+    migrations) rely on this. Multi-row INSERT ... VALUES (...),(...)
+    ("insertmanyvalues", insertmanyvalues_page_size) only applies to Core
+    insert() constructs, which nothing here uses yet.
+    """
     connect_args = {
         "keepalives": 1,
         "keepalives_idle": 30,
         "keepalives_interval": 10,
         "keepalives_count": 5,
+        # Bound tail latency: the server cancels runaway statements / stuck
+        # transactions, and the client gives up on an unacked socket after 15s
+        # instead of hanging until keepalives notice.
+        "options": "-c statement_timeout=15000 -c idle_in_transaction_session_timeout=30000",
+        "tcp_user_timeout": 15000,
     }
     return create_engine(
         db_url,
-        pool_pre_ping=True,
-        pool_recycle=300,
-        pool_size=3,
-        max_overflow=2,
+        # No pre-ping: it costs a SELECT 1 round-trip on every checkout.
+        # Supavisor drops clients idle for 5 min, so recycle just under that;
+        # TCP keepalives catch peers that vanish in between.
+        pool_pre_ping=False,
+        pool_recycle=280,
+        pool_size=5,
+        max_overflow=5,
         pool_timeout=30,
+        # LIFO keeps reusing the hottest connection; idle extras age out via pool_recycle
+        pool_use_lifo=True,
+        executemany_mode="values_plus_batch",
+        executemany_batch_page_size=500,
+        insertmanyvalues_page_size=1000,
         connect_args=connect_args,
     )
 
@@ -73,7 +107,7 @@ def _smoke_test(engine: Engine) -> None:
         conn.execute(text("SELECT 1;")).fetchone()
 
 @st.cache_resource(show_spinner=False)
-def get_engine_and_info() -> tuple[Engine, Engine | None, dict]:
+def get_engine_and_info() -> tuple[Engine, Engine | None, types.MappingProxyType]:
     """
     ENGINE: used for queries
       - cloud: prefer pooler
@@ -90,12 +124,14 @@ def get_engine_and_info() -> tuple[Engine, Engine | None, dict]:
         st.error("❌ DB_URL_POOLER missing. Set it in Streamlit Secrets (cloud) or .env (local).")
         st.stop()
 
-    # ENGINE (pooler)
+    # ENGINE (pooler) — no eager SELECT 1 on boot: the first real query
+    # surfaces a bad URL anyway. DEBUG_DB keeps the fail-fast check.
     try:
         engine = _make_engine(pooler)
-        _smoke_test(engine)
-        info = _parse_db_info(pooler)
-        info["selected"] = "pooler"
+        if get_debug_flag():
+            _smoke_test(engine)
+        # Read-only view: the lru_cached dict must never be mutated downstream
+        info = types.MappingProxyType(_parse_db_info(pooler) | {"selected": "pooler"})
     except Exception as e:
         st.error(f"❌ Pooler connection failed: {e}")
         st.stop()
@@ -105,7 +141,10 @@ def get_engine_and_info() -> tuple[Engine, Engine | None, dict]:
     if migrations_url:
         try:
             migrations_engine = _make_engine(migrations_url)
-            _smoke_test(migrations_engine)
+            # Only DDL uses this engine, and run_migrations already falls back
+            # to ENGINE if it can't connect; skip the extra cold-start RTT.
+            if get_debug_flag():
+                _smoke_test(migrations_engine)
         except Exception:
             # Don't stop the app; just warn. We'll fallback to ENGINE for DDL (not ideal).
             migrations_engine = None
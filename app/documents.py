@@ -0,0 +1,44 @@
+# app/documents.py
+import gzip
+import hashlib
+import uuid
+from sqlalchemy import text
+
+# Source texts live once per distinct document in public.documents
+# (migration 005): gzip-compressed, deduplicated on sha256. Review rows only
+# carry the document_id.
+
+_FIND_DOCUMENT = text("SELECT id FROM public.documents WHERE sha256 = :sha")
+
+# DO NOTHING (not DO UPDATE): a conflicting insert must not lock or rewrite
+# the existing row. RETURNING is then empty and the caller re-probes.
+_INSERT_DOCUMENT = text("""
+    INSERT INTO public.documents (id, sha256, text_compressed)
+    VALUES (:id, :sha, :blob)
+    ON CONFLICT (sha256) DO NOTHING
+    RETURNING id
+""")
+
+def document_id_for(conn, original: str) -> uuid.UUID:
+    """
+    Id of the stored copy of `original`, inserting it first if it's new.
+    Runs on the caller's connection/transaction. The text is only gzipped
+    and sent to the server when its sha256 isn't stored yet.
+    """
+    raw = original.encode("utf-8")
+    sha = hashlib.sha256(raw).digest()
+
+    doc_id = conn.execute(_FIND_DOCUMENT, {"sha": sha}).scalar()
+    if doc_id is not None:
+        return doc_id
+
+    doc_id = conn.execute(_INSERT_DOCUMENT, {
+        "id": uuid.uuid4(),
+        "sha": sha,
+        "blob": gzip.compress(raw, compresslevel=6),
+    }).scalar()
+    if doc_id is None:
+        # A concurrent save committed the same document between our probe
+        # and insert; under READ COMMITTED a fresh statement now sees it.
+        doc_id = conn.execute(_FIND_DOCUMENT, {"sha": sha}).scalar_one()
+    return doc_id
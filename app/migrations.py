@@ -53,21 +53,86 @@ MIGRATIONS = [
         CREATE INDEX IF NOT EXISTS idx_audit_time ON public.audit_events (created_at DESC);
         """,
     },
+    {
+        "id": "004_history_view",
+        "sql": """
+        CREATE OR REPLACE VIEW public.review_history AS
+            SELECT id::text AS id, summary AS text, score,
+                   approved_by AS reviewer, feedback,
+                   approved_at AS ts, 'Approved' AS status
+            FROM public.approved_summaries
+            UNION ALL
+            SELECT id::text AS id, rejected_summary AS text, score,
+                   rejected_by AS reviewer, feedback,
+                   rejected_at AS ts, 'Rejected' AS status
+            FROM public.rejected_summaries;
+        """,
+    },
+    {
+        "id": "005_documents",
+        "sql": """
+        CREATE TABLE IF NOT EXISTS public.documents (
+            id UUID PRIMARY KEY,
+            sha256 BYTEA NOT NULL UNIQUE,
+            text_compressed BYTEA NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+
+        ALTER TABLE public.approved_summaries
+            ADD COLUMN IF NOT EXISTS document_id UUID REFERENCES public.documents (id),
+            ALTER COLUMN original_text DROP NOT NULL;
+        ALTER TABLE public.rejected_summaries
+            ADD COLUMN IF NOT EXISTS document_id UUID REFERENCES public.documents (id),
+            ALTER COLUMN original_text DROP NOT NULL;
+        """,
+    },
+    {
+        "id": "006_history_covering_idx",
+        "sql": """
+        CREATE INDEX IF NOT EXISTS idx_approved_time_cov
+            ON public.approved_summaries (approved_at DESC) INCLUDE (score, approved_by);
+        CREATE INDEX IF NOT EXISTS idx_rejected_time_cov
+            ON public.rejected_summaries (rejected_at DESC) INCLUDE (score, rejected_by);
+        DROP INDEX IF EXISTS public.idx_approved_time;
+        DROP INDEX IF EXISTS public.idx_rejected_time;
+        """,
+    },
+    {
+        "id": "007_history_keyset_idx",
+        "sql": """
+        CREATE INDEX IF NOT EXISTS idx_approved_keyset
+            ON public.approved_summaries (approved_at DESC, (id::text) DESC);
+        CREATE INDEX IF NOT EXISTS idx_rejected_keyset
+            ON public.rejected_summaries (rejected_at DESC, (id::text) DESC);
+        """,
+    },
 ]
 
+_INSERT_MIGRATION = text("INSERT INTO public.schema_migrations (id) VALUES (:id)")
+_MIGRATIONS_LOCK_KEY = 918273645  # arbitrary app-wide pg advisory lock id
+
 def run_migrations():
+    # DDL has no bind params, so exec_driver_sql skips SQLAlchemy's text() scan.
     with ENGINE.begin() as conn:
-        conn.execute(text("""
+        # Lock + bootstrap + read applied ids in one round-trip (psycopg2
+        # returns the rows of the last statement). The xact lock serializes
+        # concurrent replicas and is released on COMMIT, so it is safe on a
+        # transaction-mode pooler too. The engine's 15s statement_timeout
+        # would cancel a replica queued behind another's DDL, so lift it for
+        # this transaction only.
+        applied = set(conn.exec_driver_sql(f"""
+        SET LOCAL statement_timeout = 0;
+        SELECT pg_advisory_xact_lock({_MIGRATIONS_LOCK_KEY});
         CREATE TABLE IF NOT EXISTS public.schema_migrations (
             id TEXT PRIMARY KEY,
             applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
         );
-        """))
-
-        applied = {r[0] for r in conn.execute(text("SELECT id FROM public.schema_migrations")).fetchall()}
+        SELECT id FROM public.schema_migrations;
+        """).scalars().all())
 
-        for m in MIGRATIONS:
-            if m["id"] in applied:
-                continue
-            conn.execute(text(m["sql"]))
-            conn.execute(text("INSERT INTO public.schema_migrations (id) VALUES (:id)"), {"id": m["id"]})
+        pending = [m for m in MIGRATIONS if m["id"] not in applied]
+        if pending:
+            # One round-trip for all pending DDL (every body ends with ";"),
+            # one batched executemany (execute_batch page) to record them.
+            conn.exec_driver_sql("\n".join(m["sql"] for m in pending))
+            conn.execute(_INSERT_MIGRATION, [{"id": m["id"]} for m in pending])
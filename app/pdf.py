@@ -0,0 +1,69 @@
+# app/pdf.py
+from __future__ import annotations
+
+from typing import IO, Iterator, Union
+
+import pdfplumber
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pdfplumber-only installs still work, just slower
+    pdfium = None
+
+PdfSource = Union[str, IO[bytes]]
+
+def iter_pages(path_or_stream: PdfSource) -> Iterator[str]:
+    """
+    Yield the text of each non-empty page, one page at a time, via PDFium
+    (C++; typically 10-50x faster than pdfminer). Only the current page's
+    text objects are alive at any point. Without pypdfium2 installed, pages
+    come from pdfplumber instead.
+    """
+    if pdfium is None:
+        yield from _iter_pages_pdfplumber(path_or_stream)
+        return
+
+    pdf = pdfium.PdfDocument(path_or_stream)
+    try:
+        for i in range(len(pdf)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            t = textpage.get_text_bounded().replace("\r\n", "\n")
+            textpage.close()
+            page.close()
+            if t.strip():
+                yield t
+    finally:
+        pdf.close()
+
+def _iter_pages_pdfplumber(path_or_stream: PdfSource) -> Iterator[str]:
+    with pdfplumber.open(path_or_stream) as pdf:
+        for page in pdf.pages:
+            t = page.extract_text() or ""
+            page.close()  # drop this page's cached layout objects
+            if t.strip():
+                yield t
+
+def extract_text_from_pdf(path_or_stream: PdfSource) -> str:
+    """
+    Text of every non-empty page, in page order.
+    Accepts a file path or a binary stream (e.g. io.BytesIO of an upload).
+    Uses PDFium first; falls back to pdfplumber if that yields no text.
+    """
+    if pdfium is not None:
+        try:
+            text_ = "\n".join(iter_pages(path_or_stream))
+        except pdfium.PdfiumError:
+            text_ = ""
+        if text_:
+            return text_
+
+    if not isinstance(path_or_stream, str):
+        path_or_stream.seek(0)
+    return _extract_pdfplumber(path_or_stream)
+
+def _extract_pdfplumber(path_or_stream: PdfSource) -> str:
+    # Serial on purpose: this only runs when PDFium found no text (scanned or
+    # image-only PDFs), where pdfminer finds little or nothing too. A process
+    # pool would fork the multithreaded Streamlit server just to confirm that.
+    return "\n".join(_iter_pages_pdfplumber(path_or_stream))
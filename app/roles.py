@@ -1,20 +1,31 @@
 # app/roles.py
 import os
+import re
 import streamlit as st
 
+# Splits and trims in one C-level pass; inner spaces ("Jane Doe") are kept.
+_SPLIT_RE = re.compile(r"\s*,\s*")
+
 def _get_list(key: str):
     try:
         val = str(st.secrets.get(key, "")).strip()
     except Exception:
         val = os.getenv(key, "").strip()
-    return [x.strip() for x in val.split(",") if x.strip()]
+    return [x for x in _SPLIT_RE.split(val) if x]
+
+@st.cache_resource(show_spinner=False)
+def _roles() -> tuple[frozenset, frozenset]:
+    # Parsed once per process and shared across sessions; entries are
+    # already stripped, so checks below are a single hash lookup.
+    return frozenset(_get_list("REVIEWERS")), frozenset(_get_list("ADMINS"))
 
-REVIEWERS = set(_get_list("REVIEWERS"))
-ADMINS = set(_get_list("ADMINS"))
+REVIEWERS, ADMINS = _roles()
 
 def is_reviewer(name: str) -> bool:
     # if not configured, allow all (keeps demo smooth)
-    return True if not REVIEWERS else name.strip() in REVIEWERS
+    reviewers, _ = _roles()
+    return (not reviewers) or name.strip() in reviewers
 
 def is_admin(name: str) -> bool:
-    return name.strip() in ADMINS
+    _, admins = _roles()
+    return name.strip() in admins
@@ -1,8 +1,8 @@
 # db_smoke.py
 import os, uuid, psycopg2
-from dotenv import load_dotenv
+from app._env_boot import ensure_env
 
-load_dotenv()
+ensure_env()
 DB_URL = os.getenv("DB_URL")
 print("DB_URL host:", DB_URL.split("@")[-1] if DB_URL and "@" in DB_URL else DB_URL)
 
@@ -2,19 +2,49 @@
 import os
 import time
 import psycopg2
-from dotenv import load_dotenv
+from app._env_boot import ensure_env
 
-load_dotenv()
+ensure_env()
 DB_URL = os.getenv("DB_URL")
 
-def ping():
+# One long-lived connection; TCP keepalives detect dead peers between pings,
+# so we only pay the TCP+TLS+auth handshake again after a failure.
+_CONN = None
+
+def _connect():
+    conn = psycopg2.connect(
+        DB_URL,
+        keepalives=1,
+        keepalives_idle=30,
+        keepalives_interval=10,
+        keepalives_count=5,
+    )
+    conn.autocommit = True
+    return conn
+
+def ping() -> bool:
+    """One SELECT 1; returns False (after logging) instead of raising."""
+    global _CONN
     try:
-        with psycopg2.connect(DB_URL) as conn:
-            with conn.cursor() as cur:
-                cur.execute("select 1;")
+        if _CONN is None or _CONN.closed:
+            _CONN = _connect()
+        with _CONN.cursor() as cur:
+            cur.execute("select 1;")
         print("[✓] Postgres ping OK")
+        return True
+    except psycopg2.OperationalError as e:
+        # Drop the broken connection; the next tick reconnects.
+        _CONN = None
+        print("[✗] DB ping failed:", e)
     except Exception as e:
         print("[✗] DB ping failed:", e)
+    return False
+
+def close():
+    global _CONN
+    if _CONN is not None and not _CONN.closed:
+        _CONN.close()
+    _CONN = None
 
 if __name__ == "__main__":
     while True:
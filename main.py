@@ -13,32 +13,44 @@ Note about environment files and virtual environments:
 This approach helps keep secrets safe while making setup easier for collaborators.
 """
 import os
+import re
 import uuid
-import psycopg2
 import openai
 import pdfplumber
-from dotenv import load_dotenv
+from sqlalchemy import text
+from app._env_boot import ensure_env
 
 # ✅ Load environment variables from .env file
-load_dotenv()
+ensure_env()
 
-# ✅ Get API Key and DB Connection String
+# ✅ Get API Key
 openai.api_key = os.getenv("OPENAI_API_KEY")
-DB_CONNECTION_STRING = os.getenv("DB_URL")
 
 # ✅ Debug check (can be removed in production)
 if not openai.api_key:
     raise Exception("❌ OPENAI_API_KEY is missing! Check your .env file.")
-if not DB_CONNECTION_STRING:
-    raise Exception("❌ DB_URL is missing! Check your .env file.")
 
-def connect_db():
-    print("🔗 Connecting to DB...")
-    return psycopg2.connect(DB_CONNECTION_STRING)
+# ✅ Pooled engine shared by every save below. app.db resolves the URL the
+# same way the Streamlit app does (DB_URL_POOLER from secrets/.env, else
+# DB_URL), so validate what it actually picked, not DB_URL alone.
+try:
+    from app.db import ENGINE
+except Exception as e:
+    raise Exception("❌ No usable database URL! Set DB_URL_POOLER (or DB_URL) in your .env file.") from e
+if not ENGINE.url.host:
+    raise Exception("❌ Database URL has no host! Check DB_URL_POOLER / DB_URL in your .env file.")
+
+from app.documents import document_id_for
 
 def extract_text_from_pdf(pdf_path):
+    # extract_text() is the expensive call; run it once per page
+    parts = []
     with pdfplumber.open(pdf_path) as pdf:
-        return "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
+        for page in pdf.pages:
+            t = page.extract_text()
+            if t:
+                parts.append(t)
+    return "\n".join(parts)
 
 def generate_summary(text):
     response = openai.chat.completions.create(
@@ -50,48 +62,46 @@ def generate_summary(text):
     )
     return response.choices[0].message.content
 
+_UNCERTAIN_RE = re.compile(r"maybe|probably|i think")
+_TOPIC_RE = re.compile(r"asset allocation|sip|tax|portfolio|emotional|risk|monitor|rebalance")
+_GRAMMAR_RE = re.compile(r"  |\.\.| ,|,,| \.")
+
 def score_summary(summary, original_text):
-    flagged_uncertain = any(word in summary.lower() for word in ["maybe", "probably", "i think"])
+    lower = summary.lower()
+    flagged_uncertain = bool(_UNCERTAIN_RE.search(lower))
     flagged_too_short = len(summary.split()) < 25
 
-    key_topics = ["asset allocation", "sip", "tax", "portfolio", "emotional", "risk", "monitor", "rebalance"]
-    coverage_hits = sum(1 for topic in key_topics if topic in summary.lower())
+    coverage_hits = len(set(_TOPIC_RE.findall(lower)))
     coverage_score = min(coverage_hits, 4)
 
     sentences = [s.strip() for s in summary.split(".") if s.strip()]
     avg_len = sum(len(s.split()) for s in sentences) / len(sentences) if sentences else 0
     clarity_score = 3 if 10 <= avg_len <= 20 else 2 if avg_len > 0 else 1
 
-    grammar_issues = ["  ", "..", " ,", ",,", " ."]
-    language_score = 2 if any(issue in summary for issue in grammar_issues) else 3
+    language_score = 2 if _GRAMMAR_RE.search(summary) else 3
 
     total_score = coverage_score + clarity_score + language_score
     return total_score, flagged_uncertain, flagged_too_short
 
+_INSERT_APPROVED = text("""
+    INSERT INTO approved_summaries
+    (id, document_id, summary, score, flagged_uncertain, flagged_too_short, approved_by, feedback)
+    VALUES (:id, :document_id, :summary, :score, :uncertain, :too_short, :reviewer, :feedback)
+""")
+_INSERT_REJECTED = text("""
+    INSERT INTO rejected_summaries
+    (id, document_id, rejected_summary, score, flagged_uncertain, flagged_too_short, feedback, rejected_by)
+    VALUES (:id, :document_id, :summary, :score, :uncertain, :too_short, :feedback, :reviewer)
+""")
+
 def store_summary(table, data):
-    conn = connect_db()
-    cur = conn.cursor()
-    if table == "approved_summaries":
-        cur.execute("""
-            INSERT INTO approved_summaries 
-            (id, original_text, summary, score, flagged_uncertain, flagged_too_short, approved_by, feedback)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            str(uuid.uuid4()), data['original'], data['summary'], data['score'],
-            data['uncertain'], data['too_short'], data['reviewer'], data.get('feedback')
-        ))
-    else:
-        cur.execute("""
-            INSERT INTO rejected_summaries 
-            (id, original_text, rejected_summary, score, flagged_uncertain, flagged_too_short, feedback, rejected_by)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            str(uuid.uuid4()), data['original'], data['summary'], data['score'],
-            data['uncertain'], data['too_short'], data['feedback'], data['reviewer']
-        ))
-    conn.commit()
-    cur.close()
-    conn.close()
+    # ✅ Reuse the pooled ENGINE instead of a fresh psycopg2 connection per save
+    params = {"id": str(uuid.uuid4()), "feedback": None, **data}
+    stmt = _INSERT_APPROVED if table == "approved_summaries" else _INSERT_REJECTED
+    with ENGINE.begin() as conn:
+        # Same dedup'd documents row the Streamlit app writes
+        params["document_id"] = document_id_for(conn, params.pop("original"))
+        conn.execute(stmt, params)
     print("✅ Data saved to DB.")
 
 def main():
@@ -0,0 +1,13 @@
+# ping_once.py
+# One-shot Supabase keep-alive for cron / systemd timers, e.g.:
+#   */10 * * * *  cd /path/to/repo && venv/bin/python ping_once.py
+# Nothing stays resident between ticks (unlike keep_supabase_alive.py's loop).
+# Exits 1 when the ping fails, so cron/systemd can see a dead keep-alive.
+import sys
+
+from keep_supabase_alive import close, ping
+
+if __name__ == "__main__":
+    ok = ping()
+    close()
+    sys.exit(0 if ok else 1)
@@ -1,23 +1,62 @@
+-- Schema as of migration 007 (the app applies these itself; see MIGRATIONS
+-- in streamlit_app.py / app/migrations.py). Kept for manual setup.
+
+CREATE TABLE documents (
+    id UUID PRIMARY KEY,
+    sha256 BYTEA NOT NULL UNIQUE,
+    text_compressed BYTEA NOT NULL,  -- gzip of the UTF-8 source text
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 CREATE TABLE approved_summaries (
     id UUID PRIMARY KEY,
-    original_text TEXT NOT NULL,
+    original_text TEXT,  -- legacy rows only; new rows use document_id
     summary TEXT NOT NULL,
     score INTEGER NOT NULL CHECK (score BETWEEN 0 AND 10),
     flagged_uncertain BOOLEAN DEFAULT FALSE,
     flagged_too_short BOOLEAN DEFAULT FALSE,
     approved_by TEXT NOT NULL,
     feedback TEXT,
-    approved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    approved_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    document_id UUID REFERENCES documents (id)
 );
 
 CREATE TABLE rejected_summaries (
     id UUID PRIMARY KEY,
-    original_text TEXT NOT NULL,
+    original_text TEXT,  -- legacy rows only; new rows use document_id
     rejected_summary TEXT NOT NULL,
-    score INTEGER NOT NULL,
+    score INTEGER NOT NULL CHECK (score BETWEEN 0 AND 10),
     flagged_uncertain BOOLEAN DEFAULT FALSE,
     flagged_too_short BOOLEAN DEFAULT FALSE,
     feedback TEXT NOT NULL,
     rejected_by TEXT NOT NULL,
-    rejected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    rejected_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    document_id UUID REFERENCES documents (id)
 );
+
+CREATE TABLE audit_events (
+    id UUID PRIMARY KEY,
+    event_type TEXT NOT NULL,
+    reviewer TEXT NOT NULL,
+    doc_id UUID,
+    score INTEGER,
+    message TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_audit_time ON audit_events (created_at DESC);
+CREATE INDEX idx_approved_time_cov ON approved_summaries (approved_at DESC) INCLUDE (score, approved_by);
+CREATE INDEX idx_rejected_time_cov ON rejected_summaries (rejected_at DESC) INCLUDE (score, rejected_by);
+CREATE INDEX idx_approved_keyset ON approved_summaries (approved_at DESC, (id::text) DESC);
+CREATE INDEX idx_rejected_keyset ON rejected_summaries (rejected_at DESC, (id::text) DESC);
+
+CREATE VIEW review_history AS
+    SELECT id::text AS id, summary AS text, score,
+           approved_by AS reviewer, feedback,
+           approved_at AS ts, 'Approved' AS status
+    FROM approved_summaries
+    UNION ALL
+    SELECT id::text AS id, rejected_summary AS text, score,
+           rejected_by AS reviewer, feedback,
+           rejected_at AS ts, 'Rejected' AS status
+    FROM rejected_summaries;
@@ -1,14 +1,22 @@
+import re
+
+# Precompiled once: each regex scans the summary in a single C-level pass
+# instead of one Python substring search per word/topic/issue.
+_UNCERTAIN_RE = re.compile(r"maybe|probably|i think|could|might|possibly")
+_TOPIC_RE = re.compile(r"asset allocation|sip|tax|portfolio|emotional|risk|monitor|rebalance")
+_GRAMMAR_RE = re.compile(r"  |\.\.| ,|,,| \.")
+
+
 def score_summary(summary, original_text):
     # Flag uncertain language
-    uncertain_words = ["maybe", "probably", "i think", "could", "might", "possibly"]
-    flagged_uncertain = any(word in summary.lower() for word in uncertain_words)
+    lower = summary.lower()
+    flagged_uncertain = bool(_UNCERTAIN_RE.search(lower))
 
     # Flag if summary is too short (less than 25 words)
     flagged_too_short = len(summary.split()) < 25
 
     # Coverage: check if key financial topics are present
-    key_topics = ["asset allocation", "sip", "tax", "portfolio", "emotional", "risk", "monitor", "rebalance"]
-    coverage_hits = sum(1 for topic in key_topics if topic in summary.lower())
+    coverage_hits = len(set(_TOPIC_RE.findall(lower)))
     coverage_score = min(coverage_hits, 4)
 
     # Clarity: Check average sentence length (ideal: 10-20 words)
@@ -20,8 +28,7 @@ def score_summary(summary, original_text):
         clarity_score = 1
 
     # Language Quality: Look for grammar/formatting issues
-    grammar_issues = ["  ", "..", " ,", ",,", " ."]
-    lang_issues_found = any(issue in summary for issue in grammar_issues)
+    lang_issues_found = bool(_GRAMMAR_RE.search(summary))
     language_score = 2 if lang_issues_found else 3
 
     total_score = coverage_score + clarity_score + language_score  # Max: 10
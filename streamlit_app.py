@@ -2,26 +2,36 @@
 # 💹 Human-in-the-Loop Financial Summarizer (Next-Level)
 # ========================================
 
+import contextlib
+import gc
+import hashlib
+import io
 import os
 import re
+import threading
 import time
 import uuid
-import tempfile
 from typing import List, Tuple, Dict
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
+import ahocorasick
 import pandas as pd
-import pdfplumber
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from sqlalchemy import text
-from dotenv import load_dotenv
-load_dotenv()  # MUST be before importing app.db
+from sqlalchemy.exc import OperationalError
+from app._env_boot import ensure_env
+ensure_env()  # MUST be before importing app.db
 
 from app.db import ENGINE, MIGRATIONS_ENGINE, show_db_debug_ui
+from app.documents import document_id_for
+from app.pdf import extract_text_from_pdf  # PDFium, serial pdfplumber fallback
 
 # HuggingFace (local summarization)
-from transformers import pipeline, AutoTokenizer
+import torch
+from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
 
 # ✅ Use your centralized DB module (local vs cloud handled there)
 from app.db import ENGINE, MIGRATIONS_ENGINE, show_db_debug_ui
@@ -126,49 +136,130 @@ MIGRATIONS = [
         CREATE INDEX IF NOT EXISTS idx_audit_time ON public.audit_events (created_at DESC);
         """,
     },
+    {
+        "id": "004_history_view",
+        "sql": """
+        CREATE OR REPLACE VIEW public.review_history AS
+            SELECT id::text AS id, summary AS text, score,
+                   approved_by AS reviewer, feedback,
+                   approved_at AS ts, 'Approved' AS status
+            FROM public.approved_summaries
+            UNION ALL
+            SELECT id::text AS id, rejected_summary AS text, score,
+                   rejected_by AS reviewer, feedback,
+                   rejected_at AS ts, 'Rejected' AS status
+            FROM public.rejected_summaries;
+        """,
+    },
+    {
+        "id": "005_documents",
+        "sql": """
+        CREATE TABLE IF NOT EXISTS public.documents (
+            id UUID PRIMARY KEY,
+            sha256 BYTEA NOT NULL UNIQUE,
+            text_compressed BYTEA NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+
+        ALTER TABLE public.approved_summaries
+            ADD COLUMN IF NOT EXISTS document_id UUID REFERENCES public.documents (id),
+            ALTER COLUMN original_text DROP NOT NULL;
+        ALTER TABLE public.rejected_summaries
+            ADD COLUMN IF NOT EXISTS document_id UUID REFERENCES public.documents (id),
+            ALTER COLUMN original_text DROP NOT NULL;
+        """,
+    },
+    {
+        "id": "006_history_covering_idx",
+        "sql": """
+        CREATE INDEX IF NOT EXISTS idx_approved_time_cov
+            ON public.approved_summaries (approved_at DESC) INCLUDE (score, approved_by);
+        CREATE INDEX IF NOT EXISTS idx_rejected_time_cov
+            ON public.rejected_summaries (rejected_at DESC) INCLUDE (score, rejected_by);
+        DROP INDEX IF EXISTS public.idx_approved_time;
+        DROP INDEX IF EXISTS public.idx_rejected_time;
+        """,
+    },
+    {
+        "id": "007_history_keyset_idx",
+        "sql": """
+        CREATE INDEX IF NOT EXISTS idx_approved_keyset
+            ON public.approved_summaries (approved_at DESC, (id::text) DESC);
+        CREATE INDEX IF NOT EXISTS idx_rejected_keyset
+            ON public.rejected_summaries (rejected_at DESC, (id::text) DESC);
+        """,
+    },
 ]
 
-def run_migrations():
-    # ✅ IMPORTANT: DDL should run on DIRECT DB (5432) when available
-    engine_for_ddl = MIGRATIONS_ENGINE or ENGINE
+_INSERT_MIGRATION = text("INSERT INTO public.schema_migrations (id) VALUES (:id)")
+_MIGRATIONS_LOCK_KEY = 918273645  # arbitrary app-wide pg advisory lock id
 
+@st.cache_resource(show_spinner=False)
+def run_migrations() -> bool:
+    # Once per process: reruns and new sessions hit the cache, not the DB.
+    # A raised error isn't cached, so a failed attempt retries next rerun.
+    # ✅ IMPORTANT: DDL should run on DIRECT DB (5432) when available
+    if MIGRATIONS_ENGINE is not None:
+        try:
+            _apply_migrations(MIGRATIONS_ENGINE)
+            return True
+        except OperationalError as e:
+            # Direct DB unreachable (e.g. IPv6-only host) -> fall back to pooler.
+            # An error the server itself raised (QueryCanceled, lock timeout,
+            # a failing DDL, ...) carries a SQLSTATE: the host is reachable,
+            # so surface it instead of re-running the DDL through the pooler.
+            if getattr(e.orig, "pgcode", None):
+                raise
+    _apply_migrations(ENGINE)
+    return True
+
+def _apply_migrations(engine_for_ddl):
+    # DDL has no bind params -> exec_driver_sql (no text() parsing)
     with engine_for_ddl.begin() as conn:
-        conn.execute(text("""
+        # Lock + bootstrap + read applied ids in one round-trip (psycopg2
+        # returns the rows of the last statement). The xact lock serializes
+        # concurrent replicas and is released on COMMIT, so it is safe on a
+        # transaction-mode pooler too. The engine's 15s statement_timeout
+        # would cancel a replica queued behind another's DDL, so lift it for
+        # this transaction only.
+        applied = set(conn.exec_driver_sql(f"""
+        SET LOCAL statement_timeout = 0;
+        SELECT pg_advisory_xact_lock({_MIGRATIONS_LOCK_KEY});
         CREATE TABLE IF NOT EXISTS public.schema_migrations (
             id TEXT PRIMARY KEY,
             applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
         );
-        """))
-
-        applied = {
-            r[0] for r in conn.execute(text("SELECT id FROM public.schema_migrations")).fetchall()
-        }
-
-        for m in MIGRATIONS:
-            if m["id"] in applied:
-                continue
-            conn.execute(text(m["sql"]))
-            conn.execute(
-                text("INSERT INTO public.schema_migrations (id) VALUES (:id)"),
-                {"id": m["id"]},
-            )
-
-def log_event(event_type: str, reviewer: str, doc_id=None, score=None, message=None):
-    payload = {
-        "id": str(uuid.uuid4()),
+        SELECT id FROM public.schema_migrations;
+        """).scalars().all())
+
+        pending = [m for m in MIGRATIONS if m["id"] not in applied]
+        if pending:
+            # One round-trip for all pending DDL (every body ends with ";"),
+            # one batched executemany (execute_batch page) to record them.
+            conn.exec_driver_sql("\n".join(m["sql"] for m in pending))
+            conn.execute(_INSERT_MIGRATION, [{"id": m["id"]} for m in pending])
+
+_INSERT_AUDIT = text("""
+    INSERT INTO public.audit_events (id, event_type, reviewer, doc_id, score, message)
+    VALUES (:id, :event_type, :reviewer, :doc_id, :score, :message)
+""")
+
+def _audit_payload(event_type: str, reviewer: str, doc_id=None, score=None, message=None) -> dict:
+    return {
+        "id": uuid.uuid4(),
         "event_type": event_type,
         "reviewer": reviewer,
-        "doc_id": str(doc_id) if doc_id else None,
+        "doc_id": doc_id if isinstance(doc_id, uuid.UUID) else (uuid.UUID(doc_id) if doc_id else None),
         "score": score,
         "message": message,
     }
+
+def log_event(event_type: str, reviewer: str, doc_id=None, score=None, message=None):
+    payload = _audit_payload(event_type, reviewer, doc_id=doc_id, score=score, message=message)
     with ENGINE.begin() as conn:
-        conn.execute(text("""
-            INSERT INTO public.audit_events (id, event_type, reviewer, doc_id, score, message)
-            VALUES (:id, :event_type, :reviewer, :doc_id, :score, :message)
-        """), payload)
+        conn.execute(_INSERT_AUDIT, payload)
 
-# Run migrations at startup
+# Run migrations at startup (once per process, see run_migrations)
 try:
     run_migrations()
 except Exception as e:
@@ -198,87 +289,237 @@ def safe_show_current_connection():
 # ======================================================
 
 @st.cache_resource(show_spinner=False)
-def get_summarizer(mode: str):
+def _summarizer_slot() -> dict:
+    # Process-wide LRU-of-1: only one model stays resident across sessions
+    return {"mode": None, "pipe": None, "lock": threading.Lock()}
+
+@contextlib.contextmanager
+def use_summarizer(mode: str):
+    """
+    Yield the pipeline for `mode`, holding the slot lock until the caller is
+    done with it. Inference is therefore serialized process-wide, which is
+    what keeps peak RAM at one model: a swap can't start while another
+    session is still running the old model.
+
+    Known limit: the slot is shared by every session, so two users on
+    different Speed modes evict each other and pay a full model load (tens
+    of seconds for bart-large) on each alternating Generate click.
+    """
+    slot = _summarizer_slot()
+    with slot["lock"]:
+        if slot["mode"] != mode:
+            # Free the previous model before loading the next
+            slot["mode"], slot["pipe"] = None, None
+            gc.collect()
+            slot["pipe"] = _build_summarizer(mode)
+            slot["mode"] = mode
+        yield slot["pipe"]
+
+# "torch" (default) or "onnx" (int8 ONNX Runtime via optimum, KV-cache decoder)
+SUMMARIZER_BACKEND = os.getenv("SUMMARIZER_BACKEND", "torch").strip().lower()
+ONNX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "onnx")
+_ONNX_PARTS = ("encoder_model", "decoder_model", "decoder_with_past_model")
+
+def _load_onnx(model: str):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    # Export + quantize once, then reload the saved graphs on later cold starts
+    cache_dir = os.path.join(ONNX_CACHE_DIR, model.replace("/", "--"))
+    if not os.path.isfile(os.path.join(cache_dir, "config.json")):
+        ORTModelForSeq2SeqLM.from_pretrained(model, export=True, use_cache=True).save_pretrained(cache_dir)
+    if not all(os.path.isfile(os.path.join(cache_dir, f"{p}_quantized.onnx")) for p in _ONNX_PARTS):
+        _quantize_onnx(cache_dir)
+
+    return ORTModelForSeq2SeqLM.from_pretrained(
+        cache_dir,
+        use_cache=True,
+        encoder_file_name="encoder_model_quantized.onnx",
+        decoder_file_name="decoder_model_quantized.onnx",
+        decoder_with_past_file_name="decoder_with_past_model_quantized.onnx",
+    )
+
+def _quantize_onnx(cache_dir: str):
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    # Dynamic int8; the AVX-512 (VNNI) config skips reduce_range, AVX2 needs it
+    if torch.backends.cpu.get_cpu_capability().startswith("AVX512"):
+        qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+    else:
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=True, reduce_range=True)
+    for part in _ONNX_PARTS:
+        quantizer = ORTQuantizer.from_pretrained(cache_dir, file_name=f"{part}.onnx")
+        quantizer.quantize(save_dir=cache_dir, quantization_config=qconfig)
+
+def _model_name(mode: str) -> str:
     if mode == "Ultra-Fast":
-        model = "t5-small"  # needs sentencepiece sometimes
+        return "t5-small"  # needs sentencepiece sometimes
     elif mode == "Fast":
-        model = "sshleifer/distilbart-cnn-12-6"
-    else:
-        model = "facebook/bart-large-cnn"
+        return "sshleifer/distilbart-cnn-12-6"
+    return "facebook/bart-large-cnn"
+
+@st.cache_resource(show_spinner=False)
+def get_tokenizer(mode: str):
+    # Tokenizers are a few MB: cache one per mode, independent of the model
+    # slot, so cheap checks never load (or evict) a model
+    model = _model_name(mode)
+    try:
+        return AutoTokenizer.from_pretrained(model, use_fast=True)
+    except (ValueError, ImportError, OSError):
+        # e.g. T5 fast-tokenizer conversion without sentencepiece/protobuf
+        return AutoTokenizer.from_pretrained(model, use_fast=False)
 
-    tokenizer = AutoTokenizer.from_pretrained(model, use_fast=False)
-    return pipeline("summarization", model=model, tokenizer=tokenizer, device=-1)
+def _build_summarizer(mode: str):
+    model = _model_name(mode)
+    tokenizer = get_tokenizer(mode)
+
+    if SUMMARIZER_BACKEND == "onnx":
+        return pipeline("summarization", model=_load_onnx(model), tokenizer=tokenizer, device=-1)
+
+    # bf16 halves weight bandwidth, but is only fast on CPUs with native bf16
+    dtype = torch.bfloat16 if _cpu_has_bf16() else torch.float32
+    try:
+        # fused scaled-dot-product attention (BART/DistilBART)
+        seq2seq = AutoModelForSeq2SeqLM.from_pretrained(model, torch_dtype=dtype, attn_implementation="sdpa")
+    except (ValueError, ImportError):
+        # T5 has no SDPA path in this transformers version
+        seq2seq = AutoModelForSeq2SeqLM.from_pretrained(model, torch_dtype=dtype)
+
+    if dtype is torch.float32:
+        # No native bf16: int8 dynamic quantization of the Linear layers
+        # (~4x smaller weights, less memory traffic in the bandwidth-bound decoder)
+        seq2seq = torch.ao.quantization.quantize_dynamic(seq2seq, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("summarization", model=seq2seq, tokenizer=tokenizer, device=-1)
+
+def _cpu_has_bf16() -> bool:
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
 
 # ======================================================
 # 📄 PDF Processing
 # ======================================================
 
-def extract_text_from_pdf(path: str) -> str:
-    pages = []
-    with pdfplumber.open(path) as pdf:
-        for p in pdf.pages:
-            t = p.extract_text() or ""
-            if t.strip():
-                pages.append(t)
-    return "\n".join(pages)
+# One pass: a lone non-printable -> " ", any 2+ run of whitespace/non-printables -> " "
+_RE_JUNK = re.compile(r"(?:[^\x09\x0A\x0D\x20-\x7E]|\s){2,}|[^\x09\x0A\x0D\x20-\x7E]")
 
 def clean_text(txt: str) -> str:
-    txt = re.sub(r"[^\x09\x0A\x0D\x20-\x7E]", " ", txt)
-    txt = re.sub(r"\s{2,}", " ", txt)
-    return txt.strip()
+    return _RE_JUNK.sub(" ", txt).strip()
 
 def chunk_text(text_: str, tokenizer, max_tokens: int) -> List[str]:
-    words = text_.split()
-    chunks, current, count = [], [], 0
-
-    for w in words:
-        tokens = len(tokenizer.encode(w, add_special_tokens=False))
-        if count + tokens > max_tokens and current:
-            chunks.append(" ".join(current))
-            current, count = [w], tokens
-        else:
-            current.append(w)
-            count += tokens
-
-    if current:
-        chunks.append(" ".join(current))
-    return chunks
+    # Tokenize the whole document once and cut it into max_tokens windows
+    if not text_.strip():
+        return []
+
+    if tokenizer.is_fast:
+        # Rust tokenizer: slice the original text by char offsets (no decode)
+        offsets = tokenizer(
+            text_, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )["offset_mapping"]
+        chunks = [
+            text_[offsets[i][0]:offsets[min(i + max_tokens, len(offsets)) - 1][1]].strip()
+            for i in range(0, len(offsets), max_tokens)
+        ]
+    else:
+        ids = tokenizer.encode(text_, add_special_tokens=False, verbose=False)
+        chunks = [
+            tokenizer.decode(ids[i:i + max_tokens], skip_special_tokens=True).strip()
+            for i in range(0, len(ids), max_tokens)
+        ]
+    # a window of bare special/whitespace tokens decodes to "": don't spend a
+    # forward pass on it
+    return [c for c in chunks if c]
 
 # ======================================================
 # 🧾 Summarization Pipeline
 # ======================================================
 
-def summarize_text(text_: str, mode: str, detail: str, placeholder):
-    summarizer = get_summarizer(mode)
-    tokenizer = summarizer.tokenizer
+SUMMARY_BATCH = 8
+# Length cap for the joined summary, enforced without a second model call
+SUMMARY_MAX_WORDS = 240
+_SUMMARY_MAX_TOKENS = 320  # ~240 words of generated text
+_MIN_CHUNK_TOKENS = 30
+_SHORT_INPUT_TOKENS = 256
+
+_DETAIL_LENGTHS = {
+    "Concise": (60, 30),
+    "Balanced": (120, 60),
+    "Detailed": (180, 90),
+}
+
+def _chunk_limit(tokenizer) -> int:
+    return int(0.85 * getattr(tokenizer, "model_max_length", 512))
 
+def summarize_text(text_: str, mode: str, detail: str, skip_short: bool = False):
+    # Pure (no st.* elements): it runs under st.cache_data, which can only
+    # replay elements created inside the cached call
     cleaned = clean_text(text_)
-    model_max = getattr(tokenizer, "model_max_length", 512)
-    limit = int(0.85 * model_max)
+    max_len, min_len = _DETAIL_LENGTHS[detail]
+
+    if skip_short:
+        # Decided with the tokenizer alone, before the model slot is touched.
+        # Every word is >= 1 token, so only near-threshold docs get tokenized.
+        words = cleaned.split()
+        tokenizer = get_tokenizer(mode)
+        short_limit = min(_chunk_limit(tokenizer), _SHORT_INPUT_TOKENS)
+        if len(words) < short_limit and len(
+            tokenizer(cleaned, add_special_tokens=False, verbose=False)["input_ids"]
+        ) < short_limit:
+            # Already shorter than a summary would be: return it as-is
+            # (capped at max_len words) instead of a full model forward pass
+            return " ".join(words[:max_len]), True
+
+    with use_summarizer(mode) as summarizer:
+        return _summarize_with(summarizer, cleaned, mode, max_len, min_len)
+
+def _summarize_with(summarizer, cleaned: str, mode: str, max_len: int, min_len: int):
+    tokenizer = summarizer.tokenizer
+    limit = _chunk_limit(tokenizer)
 
     chunks = chunk_text(cleaned, tokenizer, limit) or [cleaned]
+    if len(chunks) > 1:
+        # Share the token budget across chunks so the joined result stays near
+        # SUMMARY_MAX_WORDS (and shorter decodes are cheaper too)
+        max_len = min(max_len, max(_MIN_CHUNK_TOKENS, _SUMMARY_MAX_TOKENS // len(chunks)))
+        min_len = min(min_len, max_len // 2)
 
-    config = {
-        "Concise": (60, 30),
-        "Balanced": (120, 60),
-        "Detailed": (180, 90),
-    }
-    max_len, min_len = config[detail]
+    # Ultra-Fast: greedy decoding instead of the model's default beam search
+    gen_kwargs = {"num_beams": 1} if mode == "Ultra-Fast" else {}
 
     results = []
-    placeholder.info(f"📘 Processing {len(chunks)} chunk(s)…")
-    start = time.time()
 
-    prog = st.progress(0, text="Starting…")
-    for i, ch in enumerate(chunks, 1):
-        out = summarizer(ch, max_length=max_len, min_length=min_len, do_sample=False)[0]["summary_text"]
-        results.append(out)
-        prog.progress(i / max(1, len(chunks)), text=f"Summarized {i}/{len(chunks)}")
+    # Feed the pipeline SUMMARY_BATCH chunks per forward pass
+    for i in range(0, len(chunks), SUMMARY_BATCH):
+        batch = chunks[i:i + SUMMARY_BATCH]
+        outs = summarizer(
+            batch,
+            max_length=max_len,
+            min_length=min_len,
+            do_sample=False,
+            batch_size=len(batch),
+            truncation=True,
+            **gen_kwargs,
+        )
+        results.extend(o["summary_text"] for o in outs)
 
+    # No reduce pass over the joined chunk summaries: a second forward pass on
+    # the longest input would cost more than every chunk before it. If one is
+    # ever needed, gate it on len(chunks) > 1 and run it on "Ultra-Fast".
     final = " ".join(results).strip()
-    elapsed = int(time.time() - start)
-    prog.empty()
-    return final, elapsed
+    words = final.split()
+    if len(words) > SUMMARY_MAX_WORDS:
+        # safety net when many chunks hit the per-chunk floor
+        final = " ".join(words[:SUMMARY_MAX_WORDS])
+    return final, False
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_summary(text_hash: str, mode: str, detail: str, skip_short: bool, _text: str):
+    # Keyed on the blake2b digest only: "_" args are not hashed by cache_data,
+    # so a multi-MB document is never re-hashed or pickled into the key.
+    # Returns (summary, skipped) only: timing is measured by the caller, so a
+    # cache hit doesn't report the original run's duration.
+    return summarize_text(_text, mode, detail, skip_short=skip_short)
 
 # ======================================================
 # 📊 Scoring Logic (Dynamic)
@@ -291,27 +532,47 @@ _FIN_TERMS = {
     "gross","yoy","qoq","growth","decline"
 }
 _UNCERTAIN = {"maybe","possibly","might","could","appears","seems","approximately"}
+
+# One automaton over finance AND uncertainty terms: a single O(len(summary))
+# scan replaces one substring search per term. Values are (is_uncertain, term);
+# overlaps ("cash" / "cash flow") still count. Matching stays substring-based
+# on purpose: a token-set probe would stop "risks"/"margins" hitting their
+# terms and silently lower coverage scores.
+_TERM_AC = ahocorasick.Automaton()
+for _t in _FIN_TERMS:
+    _TERM_AC.add_word(_t, (False, _t))
+for _t in _UNCERTAIN:
+    _TERM_AC.add_word(_t, (True, _t))
+_TERM_AC.make_automaton()
 _STOPWORDS = {
     "the","a","an","and","or","of","for","to","in","on","with","is","are","was","were",
     "that","this","by","as","at","from","it","be","has","have","had","their","its","they"
 }
 
-def _tokenize(s: str):
-    return re.findall(r"[A-Za-z%]+", s.lower())
+_RE_TOK = re.compile(r"[a-z%]+")  # only ever run on lowercased text
+_RE_NUM = re.compile(r"\b\d{1,3}(?:,\d{3})*(?:\.\d+)?\b")
+
+def _tokenize_lower(s_low: str):
+    # caller passes an already-lowercased string
+    return _RE_TOK.findall(s_low)
 
+@st.cache_data(max_entries=256, show_spinner=False)
 def score_summary(summary: str) -> Tuple[int, bool, bool, Dict]:
-    words = _tokenize(summary)
+    lower = summary.lower()  # the only lowercase copy; reused below
+    words = _tokenize_lower(lower)
     wc = len(words)
     too_short = wc < 60
-    uncertain = any(u in summary.lower() for u in _UNCERTAIN)
+
+    term_hits = {v for _, v in _TERM_AC.iter(lower)}
+    uncertain = any(is_unc for is_unc, _ in term_hits)
+    coverage_hits = sum(1 for is_unc, _ in term_hits if not is_unc)
 
     score = 5.0
 
-    coverage_hits = sum(1 for t in _FIN_TERMS if t in summary.lower())
     score += min(coverage_hits * 0.25, 2.5)
 
-    num_hits = len(re.findall(r"\b\d{1,3}(?:,\d{3})*(?:\.\d+)?\b", summary))
-    pct_hits = summary.count("%")
+    num_hits = len(_RE_NUM.findall(lower))
+    pct_hits = lower.count("%")
     score += min(0.75 + 0.15 * min(num_hits, 5) + 0.15 * min(pct_hits, 4), 1.5)
 
     if uncertain:
@@ -322,10 +583,14 @@ def score_summary(summary: str) -> Tuple[int, bool, bool, Dict]:
     elif wc > 350:
         score -= 1.0
 
-    meaningful = [w for w in words if w not in _STOPWORDS]
-    freq = Counter(meaningful)
-    top = freq.most_common(5)
-    dom_pen = sum(1 for w,c in top if c / max(1, len(meaningful)) > 0.06)
+    # Count every token in C, then drop the ~30 stopword keys: cheaper than
+    # filtering each token through a Python-level comprehension first
+    freq = Counter(words)
+    for w in _STOPWORDS:
+        freq.pop(w, None)
+    # Same as counting dominant words among most_common(5), without the sort
+    threshold = 0.06 * max(1, sum(freq.values()))
+    dom_pen = min(sum(1 for c in freq.values() if c > threshold), 5)
     score -= min(dom_pen * 0.7, 2.0)
 
     score = int(max(1, min(10, round(score))))
@@ -345,20 +610,41 @@ def score_summary(summary: str) -> Tuple[int, bool, bool, Dict]:
 # 💾 Database Inserts
 # ======================================================
 
-def insert_row(table: str, payload: dict):
+# Review rows reference the deduplicated source text (app.documents) by id
+_INSERT_APPROVED = text("""
+    INSERT INTO public.approved_summaries
+    (id, document_id, summary, score, flagged_uncertain, flagged_too_short, approved_by, feedback)
+    VALUES (:id,:document_id,:s,:sc,:u,:t,:by,:fb)
+""")
+_INSERT_REJECTED = text("""
+    INSERT INTO public.rejected_summaries
+    (id, document_id, rejected_summary, score, flagged_uncertain, flagged_too_short, feedback, rejected_by)
+    VALUES (:id,:document_id,:s,:sc,:u,:t,:fb,:by)
+""")
+
+def insert_row(table: str, payload: dict, conn=None):
+    # Pass `conn` to join the caller's transaction instead of opening one
+    if conn is None:
+        with ENGINE.begin() as conn:
+            return insert_row(table, payload, conn=conn)
+    stmt = _INSERT_APPROVED if table == "approved" else _INSERT_REJECTED
+    params = {k: v for k, v in payload.items() if k != "o"}
+    params["document_id"] = document_id_for(conn, payload["o"])
+    conn.execute(stmt, params)
+
+def save_review_with_audit(decision: str, payload: dict):
+    """Review row (+ its document) and its APPROVE/REJECT audit event in one transaction."""
+    approved = decision == "Approve"
+    audit = _audit_payload(
+        "APPROVE" if approved else "REJECT",
+        payload["by"],
+        doc_id=payload["id"],
+        score=payload["sc"],
+        message=payload["fb"],
+    )
     with ENGINE.begin() as conn:
-        if table == "approved":
-            conn.execute(text("""
-            INSERT INTO public.approved_summaries
-            (id, original_text, summary, score, flagged_uncertain, flagged_too_short, approved_by, feedback)
-            VALUES (:id,:o,:s,:sc,:u,:t,:by,:fb)
-            """), payload)
-        else:
-            conn.execute(text("""
-            INSERT INTO public.rejected_summaries
-            (id, original_text, rejected_summary, score, flagged_uncertain, flagged_too_short, feedback, rejected_by)
-            VALUES (:id,:o,:s,:sc,:u,:t,:fb,:by)
-            """), payload)
+        insert_row("approved" if approved else "rejected", payload, conn=conn)
+        conn.execute(_INSERT_AUDIT, audit)
 
 # ======================================================
 # 🚀 UI
@@ -371,18 +657,21 @@ safe_show_current_connection()
 
 mode = st.sidebar.radio("Speed", ["Ultra-Fast", "Fast", "Quality"], index=1, key="speed_mode")
 detail = st.sidebar.select_slider("Detail", ["Concise","Balanced","Detailed"], value="Balanced", key="detail_level")
+st.sidebar.checkbox("Skip summarization for short inputs", value=False, key="skip_short")
 st.sidebar.markdown("---")
 st.sidebar.info("Made with ❤️ by **Lavanya Srivastava**")
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def _extract_cached(file_bytes: bytes) -> str:
+    # Keyed on the upload's bytes: slider/radio reruns don't re-parse the PDF
+    return extract_text_from_pdf(io.BytesIO(file_bytes))
+
 uploaded = st.file_uploader("📂 Upload a PDF (text-based)", type=["pdf"])
 
 if uploaded:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(uploaded.read())
-        pdf_path = tmp.name
-
+    # Extractors read file-like objects directly: no temp file round-trip
     with st.spinner("Extracting text…"):
-        text_data = extract_text_from_pdf(pdf_path)
+        text_data = _extract_cached(uploaded.getvalue())
 
     if not text_data.strip():
         st.error("⚠️ No readable text detected in this PDF (scanned image PDF will not work).")
@@ -392,12 +681,21 @@ if uploaded:
 
     if st.button("🧠 Generate Summary", type="primary"):
         holder = st.empty()
-        summary, elapsed = summarize_text(
-            text_data,
-            st.session_state["speed_mode"],
-            st.session_state["detail_level"],
-            holder
-        )
+        text_hash = hashlib.blake2b(text_data.encode(), digest_size=16).hexdigest()
+        # Status UI lives out here: a cache hit just returns instantly
+        start = time.time()
+        with st.spinner("📘 Summarizing…"):
+            summary, skipped = _cached_summary(
+                text_hash,
+                st.session_state["speed_mode"],
+                st.session_state["detail_level"],
+                st.session_state["skip_short"],
+                text_data,
+            )
+        elapsed = int(time.time() - start)  # ~0 on a cache hit
+        if skipped:
+            # Shown here, not inside the cached call, so cache hits show it too
+            holder.info("📘 Short document: summarization skipped.")
 
         score, uncertain, too_short, breakdown = score_summary(summary)
 
@@ -466,13 +764,10 @@ if st.session_state.get("summary"):
         }
 
         try:
+            save_review_with_audit(decision, payload)
             if decision == "Approve":
-                insert_row("approved", payload)
-                log_event("APPROVE", reviewer.strip(), doc_id=doc_id, score=int(score), message=feedback.strip())
                 st.success("✅ Saved to approved_summaries")
             else:
-                insert_row("rejected", payload)
-                log_event("REJECT", reviewer.strip(), doc_id=doc_id, score=int(score), message=feedback.strip())
                 st.warning("❌ Saved to rejected_summaries")
 
             st.session_state["_refresh_key"] = str(uuid.uuid4())
@@ -489,55 +784,135 @@ if st.session_state.get("summary"):
 # 📊 History (Approved + Rejected)
 # ======================================================
 
-st.markdown("---")
-st.markdown("### 📊 Review History")
-
-refresh_token = st.session_state.get("_refresh_key", "init")
-
-def load_history(_token: str) -> pd.DataFrame:
+@st.cache_resource(show_spinner=False)
+def _io_pool() -> ThreadPoolExecutor:
+    # Shared across reruns/sessions; psycopg2 releases the GIL while waiting
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="db-io")
+
+def _submit_io(fn, *args):
+    ctx = get_script_run_ctx()
+
+    def run():
+        # st.cache_data needs the caller's script context in worker threads
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    return _io_pool().submit(run)
+
+HISTORY_PAGE_SIZE = 50
+_HISTORY_COLUMNS = ["id", "text", "score", "reviewer", "feedback", "ts", "status"]
+
+_HISTORY_SELECT = """
+    SELECT id, text, score, reviewer, feedback, ts, status
+    FROM public.review_history
+"""
+_HISTORY_FIRST = text(_HISTORY_SELECT + """
+    ORDER BY ts DESC, id DESC
+    LIMIT :lim
+""")
+# Seek past the cursor. Spelled as `ts <= x AND (...)` rather than a bare OR
+# so the planner gets a plain range bound on ts it can push into each view
+# arm's index (an OR of two conditions is only ever a filter). Migration 007
+# indexes each arm on the view's exact sort key (ts DESC, id::text DESC), so
+# the plan is a Merge Append of two index scans that stops after LIMIT rows:
+# O(page) however deep the cursor is.
+_HISTORY_SEEK = text(_HISTORY_SELECT + """
+    WHERE ts <= :last_ts
+      AND (ts < :last_ts OR id < :last_id)
+    ORDER BY ts DESC, id DESC
+    LIMIT :lim
+""")
+
+# NB: st.cache_data skips "_"-prefixed args when hashing, so the refresh
+# token must be a plain `token` param for inserts to invalidate the cache.
+@st.cache_data(ttl=30, show_spinner=False)
+def load_history(token: str, cursor: Tuple | None = None) -> pd.DataFrame:
+    """
+    One page of history, newest first. `cursor` is the (ts, id) of the last
+    row of the previous page (None = newest page). Keyset seek: the page
+    starts at the cursor instead of skipping OFFSET rows.
+    """
     with ENGINE.connect() as conn:
-        return pd.read_sql("""
-            WITH hist AS (
-              SELECT id::text AS id, summary AS text, score,
-                     approved_by AS reviewer, feedback,
-                     approved_at AS ts, 'Approved' AS status
-              FROM public.approved_summaries
-              UNION ALL
-              SELECT id::text AS id, rejected_summary AS text, score,
-                     rejected_by AS reviewer, feedback,
-                     rejected_at AS ts, 'Rejected' AS status
-              FROM public.rejected_summaries
-            )
-            SELECT * FROM hist
-            ORDER BY ts DESC NULLS LAST, id DESC;
-        """, conn)
+        if cursor is None:
+            stmt, params = _HISTORY_FIRST, {"lim": HISTORY_PAGE_SIZE}
+        else:
+            last_ts, last_id = cursor
+            stmt = _HISTORY_SEEK
+            params = {"lim": HISTORY_PAGE_SIZE, "last_ts": last_ts, "last_id": last_id}
+        rows = conn.execute(stmt, params).all()
+    # Plain row materialization: skips read_sql's dtype inference for ~50 rows
+    return pd.DataFrame.from_records(rows, columns=_HISTORY_COLUMNS)
+
+# List queries name their columns and LIMIT: never SELECT * / original_text
+_AUDIT_COLUMNS = ["event_type", "reviewer", "doc_id", "score", "message", "created_at"]
+AUDIT_WINDOW_DAYS = 30
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_audit(token: str) -> pd.DataFrame:
+    with ENGINE.connect() as conn:
+        # The time bound turns the scan into an idx_audit_time range scan
+        rows = conn.execute(text("""
+            SELECT event_type, reviewer, doc_id::text AS doc_id, score, message, created_at
+            FROM public.audit_events
+            WHERE created_at > NOW() - make_interval(days => :days)
+            ORDER BY created_at DESC
+            LIMIT 50;
+        """), {"days": AUDIT_WINDOW_DAYS}).all()
+    return pd.DataFrame.from_records(rows, columns=_AUDIT_COLUMNS)
+
+# History + Audit in one fragment: paging/refresh clicks rerun only this
+# block (no re-extract/re-render of the summary above). Both panels stay in
+# the same fragment so their queries still overlap on the I/O pool; a full
+# app rerun still reaches them, but load_* are cache hits unless the token moved.
+@st.fragment
+def review_panels():
+    st.markdown("---")
+    st.markdown("### 📊 Review History")
+
+    refresh_token = st.session_state.get("_refresh_key", "init")
+
+    # Cursor stack: cursors[i] is the seek position for page i+1 (reset on refresh)
+    if st.session_state.get("hist_cursor_token") != refresh_token:
+        st.session_state["hist_cursor_token"] = refresh_token
+        st.session_state["hist_cursors"] = [None]
+    cursors = st.session_state["hist_cursors"]
+
+    # Fire both panel queries up front so their Supabase round-trips overlap
+    fut_hist = _submit_io(load_history, refresh_token, cursors[-1])
+    fut_audit = _submit_io(load_audit, refresh_token)
 
-try:
-    df = load_history(refresh_token)
-    st.dataframe(df, use_container_width=True, key=f"hist_{refresh_token}")
-except Exception as e:
-    st.error(f"History load failed: {e}")
+    try:
+        df = fut_hist.result()
+        st.dataframe(df, use_container_width=True, key=f"hist_{refresh_token}_{len(cursors)}")
+
+        p1, p2, p3 = st.columns([1, 1, 4])
+        if p1.button("◀ Newer", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun(scope="fragment")
+        if p2.button("Older ▶", disabled=len(df) < HISTORY_PAGE_SIZE):
+            last = df.iloc[-1]
+            cursors.append((last["ts"].to_pydatetime(), last["id"]))
+            st.rerun(scope="fragment")
+        p3.caption(f"Page {len(cursors)}")
+    except Exception as e:
+        st.error(f"History load failed: {e}")
 
-if st.button("↻ Refresh history"):
-    st.session_state["_refresh_key"] = str(uuid.uuid4())
-    st.rerun()
+    if st.button("↻ Refresh history"):
+        st.session_state["_refresh_key"] = str(uuid.uuid4())
+        st.rerun(scope="fragment")
 
-# ======================================================
-# 🧾 Audit Trail (Next Level)
-# ======================================================
+    # ======================================================
+    # 🧾 Audit Trail (Next Level)
+    # ======================================================
 
-st.markdown("### 🧾 Audit Trail (events)")
-with st.expander("Show audit events"):
-    try:
-        with ENGINE.connect() as conn:
-            df_audit = pd.read_sql("""
-                SELECT event_type, reviewer, doc_id::text AS doc_id, score, message, created_at
-                FROM public.audit_events
-                ORDER BY created_at DESC
-                LIMIT 50;
-            """, conn)
-        st.dataframe(df_audit, use_container_width=True)
-    except Exception as e:
-        st.error(f"Audit load failed: {e}")
+    st.markdown("### 🧾 Audit Trail (events)")
+    with st.expander(f"Show audit events (last {AUDIT_WINDOW_DAYS} days)"):
+        try:
+            df_audit = fut_audit.result()
+            st.dataframe(df_audit, use_container_width=True)
+        except Exception as e:
+            st.error(f"Audit load failed: {e}")
+
+review_panels()
 
 st.markdown("<div class='small-note'>— Made with ❤️ by Lavanya Srivastava</div>", unsafe_allow_html=True)